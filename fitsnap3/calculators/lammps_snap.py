@@ -6,6 +6,9 @@ import numpy as np
 
 # TODO: Ask about onehot_fraction for energy
 
+# Flat indices of the xx, yy, zz, yz, xz, xy stress components in a row-major 3x3 tensor
+_VOIGT_INDEX = np.array([0, 1, 2, 1, 0, 0]) * 3 + np.array([0, 1, 2, 2, 2, 1])
+
 
 class LammpsSnap(Calculator):
 
@@ -180,61 +183,64 @@ class LammpsSnap(Calculator):
         index = pt.fitsnap_dict['a_indices'][self._i]
 
         lmp_snap = _extract_compute_np(self._lmp, "snap", 0, 2, (nrows_snap, ncols_snap))
-        if (np.isinf(lmp_snap)).any() or (np.isnan(lmp_snap)).any():
+        if not np.isfinite(lmp_snap).all():
             raise ValueError('Nan in computed data of file {} in group {}'.format(self._data["File"],
                                                                                   self._data["Group"]))
 
         irow = 0
         icolref = ncols_bispectrum
+        # Per type offset columns of 'a' only exist without bzeroflag; they are zero for forces and virials
+        bzero = config.sections["BISPECTRUM"].bzeroflag
         if config.sections["CALCULATOR"].energy:
-            b_sum_temp = lmp_snap[irow, :ncols_bispectrum] / num_atoms
-            if not config.sections["BISPECTRUM"].bzeroflag:
-                b_sum_temp.shape = (num_types, n_coeff)
-                onehot_atoms = np.zeros((num_types, 1))
-                for atom in self._data["AtomTypes"]:
-                    onehot_atoms[config.sections["BISPECTRUM"].type_mapping[atom]-1] += 1
-                onehot_atoms /= len(self._data["AtomTypes"])
-                b_sum_temp = np.concatenate((onehot_atoms, b_sum_temp), axis=1)
-                b_sum_temp.shape = (num_types * n_coeff + num_types)
-            pt.shared_arrays['a'].array[index] = b_sum_temp
+            # type fractions were packed per config at scrape time
+            onehot_atoms = None if bzero else pt.shared_arrays['type_fraction'].sliced_array[self._i]
+            if onehot_atoms is not None and not np.isfinite(onehot_atoms).all():
+                raise ValueError('Type fractions of file {} in group {} were not packed by the scraper'.format(
+                    self._data["File"], self._data["Group"]))
+            b_sum_temp = lmp_snap[irow:irow + nrows_energy, :ncols_bispectrum]
+            _fill_a(pt.shared_arrays['a'].array[index:index+nrows_energy], b_sum_temp, 1.0 / num_atoms,
+                    onehot_atoms, num_types, n_coeff)
             ref_energy = lmp_snap[irow, icolref]
             pt.shared_arrays['b'].array[index] = (energy - ref_energy) / num_atoms
             pt.shared_arrays['w'].array[index] = self._data["eweight"]
             irow += nrows_energy
-            index += 1
+            index += nrows_energy
 
         if config.sections["CALCULATOR"].force:
             db_atom_temp = lmp_snap[irow:irow + nrows_force, :ncols_bispectrum]
-            db_atom_temp.shape = (num_atoms * ndim_force, n_coeff * num_types)
-            if not config.sections["BISPECTRUM"].bzeroflag:
-                db_atom_temp.shape = (np.shape(db_atom_temp)[0], num_types, n_coeff)
-                onehot_atoms = np.zeros((np.shape(db_atom_temp)[0], num_types, 1))
-                db_atom_temp = np.concatenate([onehot_atoms, db_atom_temp], axis=2)
-                db_atom_temp.shape = (np.shape(db_atom_temp)[0], num_types * n_coeff + num_types)
-            pt.shared_arrays['a'].array[index:index+num_atoms * ndim_force] = db_atom_temp
+            _fill_a(pt.shared_arrays['a'].array[index:index+nrows_force], db_atom_temp, 1.0,
+                    None if bzero else 0.0, num_types, n_coeff)
             ref_forces = lmp_snap[irow:irow + nrows_force, icolref]
-            pt.shared_arrays['b'].array[index:index+num_atoms * ndim_force] = \
-                self._data["Forces"].ravel() - ref_forces
-            pt.shared_arrays['w'].array[index:index+num_atoms * ndim_force] = \
-                self._data["fweight"]
+            np.subtract(self._data["Forces"].ravel(), ref_forces,
+                        out=pt.shared_arrays['b'].array[index:index+nrows_force])
+            pt.shared_arrays['w'].array[index:index+nrows_force] = self._data["fweight"]
             irow += nrows_force
-            index += num_atoms * ndim_force
+            index += nrows_force
 
         if config.sections["CALCULATOR"].stress:
-            vb_sum_temp = 1.6021765e6*lmp_snap[irow:irow + nrows_virial, :ncols_bispectrum] / lmp_volume
-            vb_sum_temp.shape = (ndim_virial, n_coeff * num_types)
-            if not config.sections["BISPECTRUM"].bzeroflag:
-                vb_sum_temp.shape = (np.shape(vb_sum_temp)[0], num_types, n_coeff)
-                onehot_atoms = np.zeros((np.shape(vb_sum_temp)[0], num_types, 1))
-                vb_sum_temp = np.concatenate([onehot_atoms, vb_sum_temp], axis=2)
-                vb_sum_temp.shape = (np.shape(vb_sum_temp)[0], num_types * n_coeff + num_types)
-            pt.shared_arrays['a'].array[index:index+ndim_virial] = vb_sum_temp
+            vb_sum_temp = lmp_snap[irow:irow + nrows_virial, :ncols_bispectrum]
+            # Unit conversion and volume are folded into one scale
+            _fill_a(pt.shared_arrays['a'].array[index:index+nrows_virial], vb_sum_temp, 1.6021765e6 / lmp_volume,
+                    None if bzero else 0.0, num_types, n_coeff)
             ref_stress = lmp_snap[irow:irow + nrows_virial, icolref]
-            pt.shared_arrays['b'].array[index:index+ndim_virial] = \
-                self._data["Stress"][[0, 1, 2, 1, 0, 0], [0, 1, 2, 2, 2, 1]].ravel() - ref_stress
-            pt.shared_arrays['w'].array[index:index+ndim_virial] = \
-                self._data["vweight"]
-            index += ndim_virial
+            np.subtract(self._data["Stress"].ravel()[_VOIGT_INDEX], ref_stress,
+                        out=pt.shared_arrays['b'].array[index:index+nrows_virial])
+            pt.shared_arrays['w'].array[index:index+nrows_virial] = self._data["vweight"]
+            index += nrows_virial
+
+
+def _fill_a(a_rows, block, scale, offsets, num_types, n_coeff):
+    """
+    Write scale * block into rows of the shared 'a' array in a single pass.
+    Row slices of the shared array are views, so no temporary copy of the block is made.
+    If offsets is not None, each type is preceded by an offset column set to offsets.
+    """
+    if offsets is None:
+        np.multiply(block, scale, out=a_rows)
+    else:
+        a_rows = a_rows.reshape((len(a_rows), num_types, n_coeff + 1))
+        a_rows[:, :, 0] = offsets
+        np.multiply(block.reshape((len(a_rows), num_types, n_coeff)), scale, out=a_rows[:, :, 1:])
 
 
 def _lammps_variables(bispec_options):
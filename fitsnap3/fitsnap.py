@@ -52,6 +52,7 @@ class FitSnap:
         self.scraper.scrape_groups()
         self.scraper.divvy_up_configs()
         self.data = self.scraper.scrape_configs()
+        self.scraper.pack_type_fractions(self.data)
         del self.scraper
 
     @pt.single_timeit
@@ -62,6 +62,6 @@ class Groups(Section):
 
         # Convert data types
         group_table = group_table.astype(dtype=group_types)
-        self.group_table = {}
-        for data_frame in group_table.itertuples():
-            self.group_table[data_frame[1]] = {self.group_sections[i+1]: item for i, item in enumerate(data_frame[2:])}
+        # Pull whole columns out once rather than building a pandas tuple per row
+        columns = [group_table[section].tolist() for section in self.group_sections]
+        self.group_table = {name: dict(zip(self.group_sections[1:], row)) for name, *row in zip(*columns)}
@@ -8,6 +8,7 @@ class Scraper(Section):
         self.scraper = self.get_value("SCRAPER", "scraper", "JSON")
         self.save_group_scrape = self.get_value("SCRAPER", "save_group_scrape", "None", "str")
         self.read_group_scrape = self.get_value("SCRAPER", "read_group_scrape", "None", "str")
+        self.processes = self.get_value("SCRAPER", "processes", "1", "int")
         self.properties = {"Stress": ["pressure", "Metal", "Metal"],
                            "Lattice": ["length", "Metal", "Metal"],
                            "Energy": ["energy", "Metal", "Metal"],
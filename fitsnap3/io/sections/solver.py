@@ -11,6 +11,9 @@ class Solver(Section):
         self.compute_testerrs = self.get_value("SOLVER", "compute_testerrs", "0", "bool")
         self.multinode_testing = self.get_value("SOLVER", "multinode_testing", "0", "bool")
         self.apply_transpose = self.get_value("SOLVER", "apply_transpose", "0", "bool")
+        self.maxiter = self.get_value("SOLVER", "maxiter", "0", "int")
+        self.single_precision = self.get_value("SOLVER", "single_precision", "0", "bool")
+        self.check_finite = self.get_value("SOLVER", "check_finite", "0", "bool")
         self.only_test = self.get_value("SOLVER", "only_test", "0", "bool")
         self.dump_a = self.get_value("SOLVER", "dump_a", "0", "bool")
         self.dump_x = self.get_value("SOLVER", "dump_x", "0", "bool")
@@ -4,7 +4,51 @@ from json import loads
 from ..parallel_tools import pt
 from ..io.output import output
 from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from itertools import repeat
 import numpy as np
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+
+def _loads(raw):
+    # orjson is much faster but stricter than the json module, so fall back to it on decode errors
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return loads(raw, parse_constant=True)
+
+
+def _read_json(file_name, properties):
+    # Only depends on its arguments so it can run in a worker process
+    with open(file_name, 'rb') as file:
+        file.readline()
+        data = _loads(file.read())
+
+    assert len(data) == 1, "More than one object (dataset) is in this file"
+
+    data = data['Dataset']
+
+    assert len(data['Data']) == 1, "More than one configuration in this dataset"
+
+    data['Group'] = file_name.split("/")[-2]
+    data['File'] = file_name.split("/")[-1]
+
+    assert all(k not in data for k in data["Data"][0].keys()), \
+        "Duplicate keys in dataset and data"
+
+    data.update(data.pop('Data')[0])  # Move data up one level
+
+    for key in properties:
+        if key in data:
+            data[key] = np.asarray(data[key])
+
+    return data
 
 
 class Json(Scraper):
@@ -20,64 +64,58 @@ class Json(Scraper):
     def scrape_configs(self):
         self.files = self.configs
         self.conversions = copy(self.default_conversions)
+        parsed_files = self._parse_files()
         for i, file_name in enumerate(self.files):
-            with open(file_name) as file:
-                file.readline()
-                try:
-                    self.data = loads(file.read(), parse_constant=True)
-                except Exception as e:
-                    output.screen("Trouble Parsing Training Data: ", file_name)
-                    output.exception(e)
-
-                assert len(self.data) == 1, "More than one object (dataset) is in this file"
-
-                self.data = self.data['Dataset']
-
-                assert len(self.data['Data']) == 1, "More than one configuration in this dataset"
+            try:
+                self.data = next(parsed_files)
+            except Exception as e:
+                output.screen("Trouble Parsing Training Data: ", file_name)
+                output.exception(e)
 
-                self.data['Group'] = file_name.split("/")[-2]
-                self.data['File'] = file_name.split("/")[-1]
+            for key in self.data:
+                if "Style" in key:
+                    if key.replace("Style", "") in self.conversions:
+                        temp = config.sections["SCRAPER"].properties[key.replace("Style", "")]
+                        temp[1] = self.data[key]
+                        self.conversions[key.replace("Style", "")] = convert(temp)
 
-                assert all(k not in self.data for k in self.data["Data"][0].keys()), \
-                    "Duplicate keys in dataset and data"
+            natoms = np.shape(self.data["Positions"])[0]
+            pt.shared_arrays["number_of_atoms"].sliced_array[i] = natoms
+            self.data["QMLattice"] = self.data["Lattice"] * self.conversions["Lattice"]
+            del self.data["Lattice"]  # We will populate this with the lammps-normalized lattice.
+            if "Label" in self.data:
+                del self.data["Label"]  # This comment line is not that useful to keep around.
 
-                self.data.update(self.data.pop('Data')[0])  # Move data up one level
+            if not isinstance(self.data["Energy"], float):
+                self.data["Energy"] = float(self.data["Energy"])
 
-                for key in self.data:
-                    if "Style" in key:
-                        if key.replace("Style", "") in self.conversions:
-                            temp = config.sections["SCRAPER"].properties[key.replace("Style", "")]
-                            temp[1] = self.data[key]
-                            self.conversions[key.replace("Style", "")] = convert(temp)
+            # Currently, ESHIFT should be in units of your training data (note there is no conversion)
+            if hasattr(config.sections["ESHIFT"], 'eshift'):
+                for atom in self.data["AtomTypes"]:
+                    self.data["Energy"] += config.sections["ESHIFT"].eshift[atom]
 
-                for key in config.sections["SCRAPER"].properties:
-                    if key in self.data:
-                        self.data[key] = np.asarray(self.data[key])
+            self.data["test_bool"] = self.test_bool[i]
 
-                natoms = np.shape(self.data["Positions"])[0]
-                pt.shared_arrays["number_of_atoms"].sliced_array[i] = natoms
-                self.data["QMLattice"] = self.data["Lattice"] * self.conversions["Lattice"]
-                del self.data["Lattice"]  # We will populate this with the lammps-normalized lattice.
-                if "Label" in self.data:
-                    del self.data["Label"]  # This comment line is not that useful to keep around.
+            self.data["Energy"] *= self.conversions["Energy"]
 
-                if not isinstance(self.data["Energy"], float):
-                    self.data["Energy"] = float(self.data["Energy"])
+            self._rotate_coords()
+            self._translate_coords()
 
-                # Currently, ESHIFT should be in units of your training data (note there is no conversion)
-                if hasattr(config.sections["ESHIFT"], 'eshift'):
-                    for atom in self.data["AtomTypes"]:
-                        self.data["Energy"] += config.sections["ESHIFT"].eshift[atom]
+            self._weighting(natoms)
 
-                self.data["test_bool"] = self.test_bool[i]
-
-                self.data["Energy"] *= self.conversions["Energy"]
-
-                self._rotate_coords()
-                self._translate_coords()
-
-                self._weighting(natoms)
-
-                self.all_data.append(self.data)
+            self.all_data.append(self.data)
 
         return self.all_data
+
+    def _parse_files(self):
+        # Reading and decoding files is independent per file, unit conversions and weighting stay in this process
+        properties = list(config.sections["SCRAPER"].properties)
+        processes = config.sections["SCRAPER"].processes
+        if processes > 1:
+            # Workers must be forked: spawned or forkserver workers re-import fitsnap3, which sets up MPI and
+            # parses the input at import time. Forking is safe here only because workers just read files.
+            with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("fork")) as executor:
+                yield from executor.map(_read_json, self.files, repeat(properties),
+                                        chunksize=max(1, len(self.files) // (4 * processes)))
+        else:
+            yield from map(_read_json, self.files, repeat(properties))
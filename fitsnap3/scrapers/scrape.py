@@ -32,13 +32,21 @@
 from ..io.input import config
 from os import path, listdir, stat
 import numpy as np
-from random import shuffle
 from ..parallel_tools import pt
 from ..io.output import output
 from ..units import convert
 from copy import copy
 # from natsort import natsorted
 
+# One-hot rows per atom type, keyed by the number of types
+_TYPE_EYE = {}
+
+
+def _type_eye(num_types):
+    if num_types not in _TYPE_EYE:
+        _TYPE_EYE[num_types] = np.eye(num_types)
+    return _TYPE_EYE[num_types]
+
 
 class Scraper:
 
@@ -90,7 +98,7 @@ class Scraper:
                 if folder not in self.files:
                     self.files[folder] = []
                 self.files[folder].append([folder + '/' + file_name, int(stat(folder + '/' + file_name).st_size)])
-            shuffle(self.files[folder], pt.get_seed)
+            self._shuffle(self.files[folder])
             nfiles = len(folder_files)
             if training_size < 1 or (training_size == 1 and size_type == float):
                 if training_size == 1:
@@ -179,6 +187,12 @@ class Scraper:
         pt.create_shared_array('number_of_atoms', number_of_configs_per_node, dtype='i')
         pt.slice_array('number_of_atoms')
         pt.shared_arrays['number_of_atoms'].configs = temp_configs
+        if not config.sections["BISPECTRUM"].bzeroflag:
+            # Only read for the per type offset columns. Shared arrays start uninitialized, so unpacked
+            # configs are NaN and caught by the calculator instead of silently fitting garbage offsets.
+            pt.create_shared_array('type_fraction', number_of_configs_per_node, config.sections["BISPECTRUM"].numtypes)
+            pt.slice_array('type_fraction')
+            pt.shared_arrays['type_fraction'].sliced_array[:] = np.nan
 
         # PROCS SPLIT UP HERE
         # TODO: Fix this split
@@ -265,6 +279,27 @@ class Scraper:
         self.data["Postions"] = new_pos
         self.data["Translation"] = trans_vec
 
+    def pack_type_fractions(self, data):
+        # Fraction of each atom type per config, stored once so calculators never loop over atoms.
+        # Called by FitSnap on the configs returned from scrape_configs, so every scraper gets it.
+        # Symbols of every scraped atom are mapped together, then one-hot rows are summed per config.
+        if config.sections["BISPECTRUM"].bzeroflag or not data:
+            return
+        num_types = config.sections["BISPECTRUM"].numtypes
+        atom_types = [configuration["AtomTypes"] for configuration in data]
+        counts = np.array([len(types) for types in atom_types])
+        symbols, inverse = np.unique(np.concatenate(atom_types), return_inverse=True)
+        types = np.array([config.sections["BISPECTRUM"].type_mapping[symbol] for symbol in symbols])[inverse]
+        onehot_atoms = np.add.reduceat(_type_eye(num_types)[types - 1], np.cumsum(counts) - counts, axis=0)
+        pt.shared_arrays["type_fraction"].sliced_array.reshape((-1, num_types))[:len(data)] = \
+            onehot_atoms / counts[:, np.newaxis]
+
+    @staticmethod
+    def _shuffle(items):
+        # In place permutation seeded from the seed shared by all ranks, so every rank sees the same order
+        rng = np.random.default_rng(int(pt.get_seed() * 2**32))
+        items[:] = [items[i] for i in rng.permutation(len(items))]
+
     @staticmethod
     def _float_to_int(a_float):
         if a_float == 0:
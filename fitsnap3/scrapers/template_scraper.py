@@ -14,6 +14,8 @@ class Template(Scraper):
 
     # Scraper must override scrape_configs method
     def scrape_configs(self):
-        """Generate and send (mutable) data to send to fitsnap"""
+        """Generate and send (mutable) data to send to fitsnap
+        Each configuration needs "AtomTypes", FitSnap packs the per config type fractions from the returned list
+        with pack_type_fractions. Scrapers used outside of FitSnap.scrape_configs must call it themselves."""
         pass
 
@@ -3,7 +3,6 @@ from ..io.input import config
 from ..parallel_tools import pt
 from ..io.output import output
 import numpy as np
-from random import shuffle
 from os import path, listdir
 from copy import copy
 import re
@@ -350,7 +349,7 @@ class XYZ(Scraper):
                             fp.write(" {}".format(item))
                         fp.write("\n")
 
-            shuffle(self.configs[file_base], pt.get_seed)
+            self._shuffle(self.configs[file_base])
             nconfigs = len(self.configs[file_base])
             if training_size < 1 or (training_size == 1 and size_type == float):
                 if training_size == 1:
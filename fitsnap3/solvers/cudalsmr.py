@@ -0,0 +1,61 @@
+from .solver import Solver
+from .lsmr import solve_lsmr, column_scale, max_iterations, check_convergence
+from ..parallel_tools import pt
+from ..io.output import output
+import numpy as np
+try:
+    import cupy as cp
+    from cupyx.scipy.sparse.linalg import LinearOperator, lsmr
+except ImportError:
+    cp = None
+
+
+def _device_available():
+    # An installed CuPy without a usable device or driver only fails at the first CUDA call
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except cp.cuda.runtime.CUDARuntimeError:
+        return False
+
+
+class CudaLSMR(Solver):
+
+    def __init__(self, name):
+        super().__init__(name)
+
+    def perform_fit(self):
+        if cp is None:
+            output.screen("CuPy could not be imported, falling back to the CPU LSMR solver")
+            self.fit = solve_lsmr()
+            return
+        if not _device_available():
+            output.screen("No usable CUDA device, falling back to the CPU LSMR solver")
+            self.fit = solve_lsmr()
+            return
+        if pt.shared_arrays['configs_per_group'].testing_elements != 0:
+            testing = -1*pt.shared_arrays['configs_per_group'].testing_elements
+        else:
+            testing = len(pt.shared_arrays['w'].array)
+        scale = column_scale(pt.shared_arrays['a'].array[:testing], pt.shared_arrays['w'].array[:testing])
+        # Products with the tall matrix are bandwidth bound, so keep it resident in device memory
+        a = cp.asarray(pt.shared_arrays['a'].array[:testing])
+        w = cp.asarray(pt.shared_arrays['w'].array[:testing])
+        scale_d = cp.asarray(scale)
+        bw = w * cp.asarray(pt.shared_arrays['b'].array[:testing])
+        aw = LinearOperator(a.shape,
+                            matvec=lambda x: w * (a @ (scale_d * x.ravel())),
+                            rmatvec=lambda y: scale_d * (a.T @ (w * y.ravel())),
+                            dtype=a.dtype)
+        fit, istop, itn = lsmr(aw, bw, atol=1.0e-10, btol=1.0e-10, maxiter=max_iterations(a.shape[1]))[:3]
+        check_convergence(int(istop), int(itn))
+        self.fit = cp.asnumpy(fit) * scale
+
+    def _dump_a(self):
+        np.savez_compressed('a.npz', a=pt.shared_arrays['a'].array)
+
+    def _dump_x(self):
+        np.savez_compressed('x.npz', x=self.fit)
+
+    def _dump_b(self):
+        b = pt.shared_arrays['a'].array @ self.fit
+        np.savez_compressed('b.npz', b=b)
@@ -0,0 +1,127 @@
+from .solver import Solver
+from ..parallel_tools import pt
+from ..io.input import config
+from ..io.output import output
+from scipy.sparse.linalg import LinearOperator, lsmr
+import numpy as np
+
+# Most float32 corrections of the float64 residual before finishing in float64
+_MAX_REFINEMENTS = 5
+
+
+class WeightedOp(LinearOperator):
+    """Applies diag(w) @ a @ diag(scale) without forming the weighted matrix"""
+
+    def __init__(self, a, w, scale):
+        super().__init__(a.dtype, a.shape)
+        self.a = a
+        self.w = w
+        self.scale = scale
+
+    def _matvec(self, x):
+        return self.w * (self.a @ (self.scale * x.ravel().astype(self.dtype, copy=False)))
+
+    def _rmatvec(self, y):
+        return self.scale * (self.a.T @ (self.w * y.ravel().astype(self.dtype, copy=False)))
+
+
+def column_scale(a, w):
+    """Inverse column norms of diag(w) @ a, which equilibrate the columns for the iterative solve"""
+    # einsum reduces in one pass without a weighted copy of a
+    norms = np.sqrt(np.einsum('ij,ij,i->j', a, a, w * w))
+    scale = np.ones_like(norms)
+    np.divide(1.0, norms, out=scale, where=norms > 0)
+    return scale
+
+
+def max_iterations(n):
+    return config.sections['SOLVER'].maxiter or max(10 * n, 1000)
+
+
+def check_convergence(istop, itn):
+    """Stop on the iteration limit rather than keep an unconverged fit, warn on the condition limit"""
+    if istop == 7:
+        raise ValueError("LSMR did not converge in {} iterations, increase maxiter in [SOLVER]".format(itn))
+    if istop == 3:
+        output.screen("Warning: LSMR stopped at the condition number limit after {} iterations, "
+                      "the system is ill-conditioned and SVD may give a better fit".format(itn))
+
+
+def _lsmr32(aw32, bw, maxiter):
+    # Tolerances much below float32 epsilon can never be met and would run every solve to maxiter
+    # lsmr seeds its condition estimate with 1e100, which overflows harmlessly in float32
+    with np.errstate(over='ignore'):
+        return lsmr(aw32, bw.astype(np.float32), atol=1.0e-6, btol=1.0e-6, maxiter=maxiter)[:2]
+
+
+def _mixed_precision(aw, aw32, bw, maxiter):
+    """
+    Refine float32 solutions against the float64 residual while that improves the fit, then finish in float64.
+    float32 cannot resolve the optimality of ill-conditioned systems, so unless refinement already meets the
+    double precision tolerance, a float64 solve warm started from the refined solution guarantees it.
+    """
+    # Columns have unit norm after column_scale, which fixes the Frobenius norm lsmr would estimate
+    norm_a = np.sqrt(aw.shape[1])
+    x = np.zeros(aw.shape[1])
+    residual, optimality = bw, np.inf
+    for _ in range(_MAX_REFINEMENTS):
+        dx, istop = _lsmr32(aw32, residual, maxiter)
+        if istop == 7:
+            output.screen("Warning: single precision LSMR stalled, finishing in double precision. "
+                          "Set single_precision = 0 in [SOLVER] for this system")
+        trial = x + dx
+        trial_residual = bw - aw.matvec(trial)
+        # Same stopping test as lsmr: |A^T r| relative to |A| |r|, an exact fit is optimal
+        trial_norm = np.linalg.norm(trial_residual)
+        trial_optimality = np.linalg.norm(aw.rmatvec(trial_residual)) / (norm_a * trial_norm) if trial_norm > 0 else 0.0
+        if trial_optimality >= optimality:
+            break
+        # float32 levels off near its own precision, further corrections then barely move the fit
+        converging = trial_optimality < 0.5 * optimality
+        x, residual, optimality = trial, trial_residual, trial_optimality
+        if optimality <= 1.0e-10 or istop == 7 or not converging:
+            break
+    if optimality > 1.0e-10:
+        x, istop, itn = lsmr(aw, bw, atol=1.0e-10, btol=1.0e-10, maxiter=maxiter, x0=x)[:3]
+        check_convergence(istop, itn)
+    return x
+
+
+def solve_lsmr():
+    """Weighted least squares fit of the training rows of the shared arrays with LSMR"""
+    if pt.shared_arrays['configs_per_group'].testing_elements != 0:
+        testing = -1*pt.shared_arrays['configs_per_group'].testing_elements
+    else:
+        testing = len(pt.shared_arrays['w'].array)
+    a, w = pt.shared_arrays['a'].array[:testing], pt.shared_arrays['w'].array[:testing]
+    # Slicing the shared arrays gives views, so only vectors of length m or n are allocated here
+    scale = column_scale(a, w)
+    aw, bw = WeightedOp(a, w, scale), w * pt.shared_arrays['b'].array[:testing]
+    if config.sections['SOLVER'].single_precision:
+        # Half the memory traffic per product for most of the iterations
+        aw32 = WeightedOp(a.astype(np.float32), w.astype(np.float32), scale.astype(np.float32))
+        fit = _mixed_precision(aw, aw32, bw, max_iterations(a.shape[1]))
+    else:
+        fit, istop, itn = lsmr(aw, bw, atol=1.0e-10, btol=1.0e-10, maxiter=max_iterations(a.shape[1]))[:3]
+        check_convergence(istop, itn)
+    # The solve is in scaled columns
+    return fit * scale
+
+
+class LSMR(Solver):
+
+    def __init__(self, name):
+        super().__init__(name)
+
+    def perform_fit(self):
+        self.fit = solve_lsmr()
+
+    def _dump_a(self):
+        np.savez_compressed('a.npz', a=pt.shared_arrays['a'].array)
+
+    def _dump_x(self):
+        np.savez_compressed('x.npz', x=self.fit)
+
+    def _dump_b(self):
+        b = pt.shared_arrays['a'].array @ self.fit
+        np.savez_compressed('b.npz', b=b)
@@ -0,0 +1,35 @@
+from .solver import Solver
+from ..parallel_tools import pt
+from ..io.input import config
+from scipy.linalg import lstsq
+import numpy as np
+
+
+class QR(Solver):
+
+    def __init__(self, name):
+        super().__init__(name)
+
+    def perform_fit(self):
+        if pt.shared_arrays['configs_per_group'].testing_elements != 0:
+            testing = -1*pt.shared_arrays['configs_per_group'].testing_elements
+        else:
+            testing = len(pt.shared_arrays['w'].array)
+        w = pt.shared_arrays['w'].array[:testing]
+        # Only a is validated by the calculator, weights (e.g. Boltzmann) and targets are checked here in O(m)
+        if not (np.isfinite(w).all() and np.isfinite(pt.shared_arrays['b'].array[:testing]).all()):
+            raise ValueError('Inf or NaN in the weights or targets of the linear system')
+        aw, bw = w[:, np.newaxis] * pt.shared_arrays['a'].array[:testing], w * pt.shared_arrays['b'].array[:testing]
+        # Complete orthogonal factorization (gelsy) instead of the SVD based default driver
+        self.fit, residues, rank, s = lstsq(aw, bw, 1.0e-13, lapack_driver='gelsy',
+                                            check_finite=config.sections['SOLVER'].check_finite)
+
+    def _dump_a(self):
+        np.savez_compressed('a.npz', a=pt.shared_arrays['a'].array)
+
+    def _dump_x(self):
+        np.savez_compressed('x.npz', x=self.fit)
+
+    def _dump_b(self):
+        b = pt.shared_arrays['a'].array @ self.fit
+        np.savez_compressed('b.npz', b=b)
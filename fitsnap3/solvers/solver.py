@@ -2,6 +2,7 @@ from ..io.input import config
 from ..parallel_tools import pt
 import numpy as np
 from pandas import DataFrame
+from scipy.linalg.blas import dgemv
 
 
 class Solver:
@@ -15,6 +16,8 @@ class Solver:
         self.errors = []
         self.weighted = 'Unweighted'
         self.residuals = None
+        self.res = None
+        self._subsystems = {}
         self.a = None
         self.b = None
         self.w = None
@@ -44,6 +47,11 @@ class Solver:
             self.fit = np.insert(self.fit, 0, 0)
 
     def error_analysis(self):
+        # Residuals only depend on the fit, so one pass of b - a @ fit serves every subsystem, group and weighting.
+        # The transpose of the row major 'a' is column major, which lets BLAS read it in place.
+        self.res = dgemv(-1.0, pt.shared_arrays['a'].array.T, np.ravel(self.fit), beta=1.0,
+                         y=np.array(pt.shared_arrays['b'].array, dtype=float), trans=1, overwrite_y=1)
+        self._subsystems = {}
         for option in ["Unweighted", "Weighted"]:
             self.weighted = option
             self._all_error()
@@ -71,10 +79,10 @@ class Solver:
 
     def _energy(self):
         testing = -1 * pt.shared_arrays['configs_per_group'].testing
-        a, b, w = self._make_abw(pt.shared_arrays['a'].energy_index, 1)
-        self._errors([[0, testing]], ['*ALL'], "Energy", a, b, w)
+        res, b, w = self._subsystem("Energy")
+        self._errors([[0, testing]], ['*ALL'], "Energy", res, b, w)
         if testing != 0:
-            self._errors([[testing, 0]], ['*ALL'], "Energy_testing", a, b, w)
+            self._errors([[testing, 0]], ['*ALL'], "Energy_testing", res, b, w)
 
     def _force(self):
         num_forces = np.array(pt.shared_arrays['a'].num_atoms)*3
@@ -82,53 +90,50 @@ class Solver:
             testing = -1 * np.sum(num_forces[-pt.shared_arrays['configs_per_group'].testing:])
         else:
             testing = 0
-        a, b, w = self._make_abw(pt.shared_arrays['a'].force_index, num_forces.tolist())
+        res, b, w = self._subsystem("Force")
         # print out predicted vs true forces
         # detailed_errors = 1
         # if detailed_errors and self.weighted == "Unweighted":
         #     from csv import writer
-        #     true, pred = b, a @ self.fit
+        #     true = b
         #     with open('detailed_errors.dat', 'w') as f:
         #         writer = writer(f, delimiter=' ')
-        #         writer.writerows(zip(true, pred, true-pred))
+        #         writer.writerows(zip(true, true-res, res))
 
-        self._errors([[0, testing]], ['*ALL'], "Force", a, b, w)
+        self._errors([[0, testing]], ['*ALL'], "Force", res, b, w)
         if testing != 0:
-            self._errors([[testing, 0]], ['*ALL'], "Force_testing", a, b, w)
+            self._errors([[testing, 0]], ['*ALL'], "Force_testing", res, b, w)
 
     def _stress(self):
         testing = -6 * pt.shared_arrays['configs_per_group'].testing
-        a, b, w = self._make_abw(pt.shared_arrays['a'].stress_index, 6)
-        self._errors([[0, testing]], ['*ALL'], "Stress", a, b, w)
+        res, b, w = self._subsystem("Stress")
+        self._errors([[0, testing]], ['*ALL'], "Stress", res, b, w)
         if testing != 0:
-            self._errors([[testing, 0]], ['*ALL'], "Stress_testing", a, b, w)
+            self._errors([[testing, 0]], ['*ALL'], "Stress_testing", res, b, w)
 
     def _combined(self):
         self._errors([[0, pt.shared_arrays["configs_per_group"].testing_elements]], ["*ALL"], "Combined")
         if pt.shared_arrays["configs_per_group"].testing_elements != 0:
             self._errors([[pt.shared_arrays["configs_per_group"].testing_elements, 0]], ['*ALL'], "Combined_testing")
 
-    @staticmethod
-    def _make_abw(type_index, buffer):
-        if isinstance(buffer, list):
-            length = sum(buffer)
-        else:
-            length = len(type_index) * buffer
-        width = np.shape(pt.shared_arrays['a'].array)[1]
-        a = np.zeros((length, width))
-        b = np.zeros((length,))
-        w = np.zeros((length,))
-        i = 0
-        for j, value in enumerate(type_index):
-            if isinstance(buffer, list):
-                spacing = buffer[j]
+    def _subsystem(self, gtype):
+        # Rows are gathered once per fit and shared by the *ALL and per group errors of both weightings
+        if gtype not in self._subsystems:
+            if gtype == "Energy":
+                res, b, w = self._make_abw(pt.shared_arrays['a'].energy_index, 1)
+            elif gtype == "Force":
+                res, b, w = self._make_abw(pt.shared_arrays['a'].force_index,
+                                            np.array(pt.shared_arrays['a'].num_atoms)*3)
+            elif gtype == "Stress":
+                res, b, w = self._make_abw(pt.shared_arrays['a'].stress_index, 6)
             else:
-                spacing = buffer
-            a[i:i+spacing] = pt.shared_arrays['a'].array[value:value+spacing]
-            b[i:i+spacing] = pt.shared_arrays['b'].array[value:value+spacing]
-            w[i:i+spacing] = pt.shared_arrays['w'].array[value:value+spacing]
-            i += spacing
-        return a, b, w
+                raise ValueError("{} is not a subsystem of the linear system".format(gtype))
+            self._subsystems[gtype] = res, b, w
+        return self._subsystems[gtype]
+
+    def _make_abw(self, type_index, buffer):
+        rows = _block_rows(type_index, buffer)
+        return self.res[rows], pt.shared_arrays['b'].array[rows], pt.shared_arrays['w'].array[rows]
 
     def _group_error(self):
         groups = []
@@ -144,22 +149,19 @@ class Solver:
         self._group_combined(groups)
 
     def _group_energy(self, groups):
-        group_index = pt.shared_arrays['a'].group_energy_index
-        length = pt.shared_arrays['a'].group_energy_length
-        index, a, b, w = self._make_group_abw(group_index, length, 1)
-        self._errors(index, groups, "Energy", a, b, w)
+        index = self._make_group_index(pt.shared_arrays['a'].group_energy_index, 1)
+        res, b, w = self._subsystem("Energy")
+        self._errors(index, groups, "Energy", res, b, w)
 
     def _group_force(self, groups):
-        group_index = pt.shared_arrays['a'].group_force_index
-        length = pt.shared_arrays['a'].group_force_length
-        index, a, b, w = self._make_group_abw(group_index, length, pt.shared_arrays['a'].num_atoms)
-        self._errors(index, groups, "Force", a, b, w)
+        index = self._make_group_index(pt.shared_arrays['a'].group_force_index, pt.shared_arrays['a'].num_atoms)
+        res, b, w = self._subsystem("Force")
+        self._errors(index, groups, "Force", res, b, w)
 
     def _group_stress(self, groups):
-        group_index = pt.shared_arrays['a'].group_stress_index
-        length = pt.shared_arrays['a'].group_stress_length*6
-        index, a, b, w = self._make_group_abw(group_index, length, 6)
-        self._errors(index, groups, "Stress", a, b, w)
+        index = self._make_group_index(pt.shared_arrays['a'].group_stress_index, 6)
+        res, b, w = self._subsystem("Stress")
+        self._errors(index, groups, "Stress", res, b, w)
 
     def _group_combined(self, groups):
         index = []
@@ -169,32 +171,20 @@ class Solver:
         self._errors(index, groups, "Combined")
 
     @staticmethod
-    def _make_group_abw(group_index, length, buffer):
+    def _make_group_index(group_index, buffer):
+        # Groups are contiguous in the subsystem rows, so only their bounds are needed
         index = []
-        width = np.shape(pt.shared_arrays['a'].array)[1]
-        if isinstance(buffer, list):
-            length = 3 * sum(buffer)
-        a = np.zeros((length, width))
-        b = np.zeros((length,))
-        w = np.zeros((length,))
         i = 0
         j = 0
         for group in group_index:
-            temp = [i]
-            for value in group:
-                if isinstance(buffer, list):
-                    spacing = buffer[j]
-                    j += 1
-                    spacing *= 3
-                else:
-                    spacing = buffer
-                a[i:i+spacing] = pt.shared_arrays['a'].array[value:value+spacing]
-                b[i:i+spacing] = pt.shared_arrays['b'].array[value:value+spacing]
-                w[i:i+spacing] = pt.shared_arrays['w'].array[value:value+spacing]
-                i += spacing
-            temp.append(i)
-            index.append(temp)
-        return index, a, b, w
+            if isinstance(buffer, list):
+                length = 3 * sum(buffer[j:j+len(group)])
+                j += len(group)
+            else:
+                length = buffer * len(group)
+            index.append([i, i+length])
+            i += length
+        return index
 
     def _config_error(self):
         config_index = 0
@@ -221,70 +211,71 @@ class Solver:
             config_index = current_index
 
     def _config_energy(self, this_config, current_index):
-        index, a, b, w = self._make_config_abw(current_index, 1)
-        self._errors(index, this_config, "Energy", a, b, w)
+        index, res, b, w = self._make_config_abw(current_index, 1)
+        self._errors(index, this_config, "Energy", res, b, w)
 
     def _config_force(self, this_config, current_index, length):
-        index, a, b, w = self._make_config_abw(current_index, length)
-        self._errors(index, this_config, "Force", a, b, w)
+        index, res, b, w = self._make_config_abw(current_index, length)
+        self._errors(index, this_config, "Force", res, b, w)
 
     def _config_stress(self, this_config, current_index):
-        index, a, b, w = self._make_config_abw(current_index, 6)
-        self._errors(index, this_config, "Stress", a, b, w)
+        index, res, b, w = self._make_config_abw(current_index, 6)
+        self._errors(index, this_config, "Stress", res, b, w)
 
     def _config_combined(self, this_config, config_index, current_index):
-        index, a, b, w = self._make_config_abw(config_index, current_index-config_index)
-        self._errors(index, this_config, "Combined", a, b, w)
+        index, res, b, w = self._make_config_abw(config_index, current_index-config_index)
+        self._errors(index, this_config, "Combined", res, b, w)
 
-    @staticmethod
-    def _make_config_abw(i, buffer):
+    def _make_config_abw(self, i, buffer):
+        # Rows of a config are contiguous, so views are enough and nothing is copied per config.
+        # Only reached through _config_error, which error_analysis currently leaves commented out.
         index = None
-        width = np.shape(pt.shared_arrays['a'].array)[1]
-        a = np.zeros((buffer, width))
-        b = np.zeros((buffer,))
-        w = np.zeros((buffer,))
-        a[:] = pt.shared_arrays['a'].array[i:i + buffer]
-        b[:] = pt.shared_arrays['b'].array[i:i + buffer]
-        w[:] = pt.shared_arrays['w'].array[i:i + buffer]
-
-        return index, a, b, w
-
-    def _errors(self, index, category, gtype, a=None, b=None, w=None):
-        if a is None:
-            a = pt.shared_arrays['a'].array
+        res = self.res[i:i + buffer]
+        b = pt.shared_arrays['b'].array[i:i + buffer]
+        w = pt.shared_arrays['w'].array[i:i + buffer]
+
+        return index, res, b, w
+
+    def _errors(self, index, category, gtype, res=None, b=None, w=None):
+        if res is None:
+            res = self.res
         if b is None:
             b = pt.shared_arrays['b'].array
         if w is None:
             w = pt.shared_arrays['w'].array
         for i, group in enumerate(category):
             if index is None:
-                a_err = a
+                res_err = res
                 b_err = b
                 w_err = w
             elif index[i][1] != 0:
-                a_err = a[index[i][0]:index[i][1]]
+                res_err = res[index[i][0]:index[i][1]]
                 b_err = b[index[i][0]:index[i][1]]
                 w_err = w[index[i][0]:index[i][1]]
             else:
-                a_err = a[index[i][0]:]
+                res_err = res[index[i][0]:]
                 b_err = b[index[i][0]:]
                 w_err = w[index[i][0]:]
-            true, pred = b_err, a_err @ self.fit
+            true = b_err
             if self.weighted == 'Weighted':
-                true, pred = w_err * true, w_err * pred
+                true, res_err = w_err * true, w_err * res_err
                 nconfig = np.count_nonzero(w_err)
             else:
-                nconfig = len(pred)
-            res = true - pred
-            mae = np.sum(np.abs(res) / nconfig)
+                nconfig = len(res_err)
+            mae = np.abs(res_err).sum() / nconfig
             # relative mae
             # rres = ((true+1)-pred)/(true+1)
             # rel_mae = np.sum(np.abs(rres) / nconfig)
-            mean_dev = np.sum(np.abs(true - np.median(true)) / nconfig)
-            ssr = np.square(res).sum()
+            mean_dev = np.abs(true - np.median(true)).sum() / nconfig
+            # Squared deviations about the mean are reused for both the standard deviation and rsq
+            true_mean = true.mean()
+            true_dev = true - true_mean
+            true_ss = true_dev @ true_dev
+            ssr = res_err @ res_err
             mse = ssr / nconfig
             rmse = np.sqrt(mse)
-            rsq = 1 - ssr / np.sum(np.square(true - (true / nconfig).sum()))
+            # rsq is taken about true.sum() / nconfig, which is not the mean when zero weights are excluded
+            rsq = 1 - ssr / (true_ss + len(true) * (true_mean - true.sum() / nconfig) ** 2)
             error_record = {
                 "Group": group,
                 "Weighting": self.weighted,
@@ -293,12 +284,12 @@ class Solver:
                 "mae": mae,
                 "rmae": mae / mean_dev,
                 "rmse": rmse,
-                "rrmse": rmse / np.std(true),
+                "rrmse": rmse / np.sqrt(true_ss / len(true)),
                 "ssr": ssr,
                 "rsq": rsq
             }
             if self.residuals is not None:
-                error_record["residual"] = res
+                error_record["residual"] = res_err
             self.errors.append(error_record)
 
     def _template_error(self):
@@ -311,4 +302,15 @@ class Solver:
         raise NotImplementedError("This method is either not implemented or solver is not a linear solver")
 
     def _dump_b(self):
-        raise NotImplementedError("This method is either not implemented or solver is not a linear solver")
\ No newline at end of file
+        raise NotImplementedError("This method is either not implemented or solver is not a linear solver")
+
+
+def _block_rows(starts, lengths):
+    """Row indices of the blocks [start, start + length), in order"""
+    starts = np.asarray(starts, dtype=int)
+    if np.ndim(lengths) == 0:
+        # Fixed size blocks (energies, virials) broadcast over a new axis instead of repeating starts
+        return (starts[:, np.newaxis] + np.arange(lengths)).ravel()
+    lengths = np.asarray(lengths, dtype=int)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
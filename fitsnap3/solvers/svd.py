@@ -16,6 +16,9 @@ class SVD(Solver):
         else:
             testing = len(pt.shared_arrays['w'].array)
         w = pt.shared_arrays['w'].array[:testing]
+        # Only a is validated by the calculator, weights (e.g. Boltzmann) and targets are checked here in O(m)
+        if not (np.isfinite(w).all() and np.isfinite(pt.shared_arrays['b'].array[:testing]).all()):
+            raise ValueError('Inf or NaN in the weights or targets of the linear system')
         aw, bw = w[:, np.newaxis] * pt.shared_arrays['a'].array[:testing], w * pt.shared_arrays['b'].array[:testing]
 #        Transpose method does not work with Quadratic SNAP (why?)
 #        We need to revisit this preconditioning of the linear problem, we can make this a bit more elegant. 
@@ -25,7 +28,7 @@ class SVD(Solver):
         if config.sections['SOLVER'].apply_transpose:
             bw = aw.T@bw
             aw = aw.T@aw
-        self.fit, residues, rank, s = lstsq(aw, bw, 1.0e-13)
+        self.fit, residues, rank, s = lstsq(aw, bw, 1.0e-13, check_finite=config.sections['SOLVER'].check_finite)
 
     def _dump_a(self):
         np.savez_compressed('a.npz', a=pt.shared_arrays['a'].array)